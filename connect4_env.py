@@ -1,6 +1,9 @@
 # connect4_env.py
 
+import sys
+
 import gymnasium as gym
+import numpy as np
 from gymnasium.utils.env_checker import check_env
 from typing import Optional
 
@@ -9,7 +12,13 @@ class EnvConnect4(gym.Env):
     """
     Gymnasium environment for the Connect 4 game.
 
-    The environment uses a 6x7 board stored as a flattened list.
+    The environment uses a 6x7 board stored as two integer bitboards,
+    one per player. Each column occupies ``num_rows + 1`` consecutive
+    bits (bottom cell first), the extra bit acting as an always-empty
+    sentinel so that shifted win checks never wrap between columns.
+    A flattened one-byte-per-cell copy of the board is kept in sync
+    for observations and rendering, and is available through ``board``.
+
     Two players take turns dropping pieces into one of the columns.
     A move is valid if the selected column is not full.
 
@@ -39,7 +48,7 @@ class EnvConnect4(gym.Env):
 
         self.observation_space = gym.spaces.Dict(
             {
-                "board": gym.spaces.MultiDiscrete([3] * (self.num_rows * self.num_cols)),
+                "board": gym.spaces.MultiDiscrete([3] * (self.num_rows * self.num_cols), dtype=np.int8),
                 "turn": gym.spaces.Discrete(n=2, start=1),
             }
         )
@@ -54,16 +63,37 @@ class EnvConnect4(gym.Env):
         self.player2_emoji = "🔴"
         self.empty_emoji = "⚫"
 
-        self.board = None
+        # Bits per column in the bitboards, including the sentinel bit
+        self._col_stride = self.num_rows + 1
+
+        self.bb = None
+        self.heights = None
+        self._legal_cache = None
+        self._legal_bits = 0
         self.turn = None
         self.count_moves = None
 
+        # Cell bytes, allocated once and cleared in place by every reset
+        self._cells = bytearray(self.num_rows * self.num_cols)
+        self._empty_cells = bytes(self.num_rows * self.num_cols)
+
+        # Read-only view handed out by ``board``, so writes cannot bypass the bitboards
+        self._cells_view = memoryview(self._cells).toreadonly()
+
+        # Boolean column flags for every legal bit mask, one row per mask
+        bits = np.arange(1 << self.num_cols)[:, None] >> np.arange(self.num_cols)
+        self._legal_flags = (bits & 1).astype(bool)
+        self._legal_flags.flags.writeable = False
+
     # ---------- Core API helpers ----------
 
     def _get_obs(self):
         """
         Returns the current observation.
 
+        Every call returns a new dictionary and board array, as
+        Gymnasium requires, so callers may keep them across steps.
+
         Returns
         -------
         dict
@@ -71,12 +101,15 @@ class EnvConnect4(gym.Env):
             player whose turn it is.
         """
         # Return a copy to prevent external modification of the environment state
-        return {"board": self.board.copy(), "turn": int(self.turn)}
+        return {"board": np.frombuffer(self._cells, dtype=np.int8).copy(), "turn": int(self.turn)}
 
     def _get_info(self, winner=0, is_draw=False):
         """
         Returns additional environment information.
 
+        The board entry is a copy of its own, so it does not share
+        memory with the observation or the environment.
+
         Parameters
         ----------
         winner : int, optional
@@ -90,9 +123,10 @@ class EnvConnect4(gym.Env):
             Additional information about the current game state.
         """
         return {
-            "board": self.board.copy(),
+            "board": np.frombuffer(self._cells, dtype=np.int8).copy(),
             "turn": int(self.turn),
             "legal_columns": self._get_legal_actions(),
+            "legal_mask": self._get_legal_mask(),
             "count_moves": int(self.count_moves),
             "winner": int(winner),
             "is_draw": bool(is_draw),
@@ -116,12 +150,107 @@ class EnvConnect4(gym.Env):
         """
         super().reset(seed=seed)
 
-        self.board = [0] * (self.num_rows * self.num_cols)
+        self.bb = [0, 0]
+        self.heights = [0] * self.num_cols
+        self._cells[:] = self._empty_cells
+        self._legal_cache = None
         self.turn = 1
         self.count_moves = 0
 
         return self._get_obs(), self._get_info()
 
+    # ---------- Board representation ----------
+
+    @property
+    def board(self):
+        """
+        Flattened view of the board, one byte per cell.
+
+        The bytes are updated alongside the bitboards by every move and
+        undo, so reading them costs nothing. Row 0 is the top row, and
+        cells hold 0 (empty), 1 (player 1) or 2 (player 2). The same
+        buffer is reused for the lifetime of the environment, so copy it
+        (e.g. with ``bytes``) to keep a position.
+
+        The view is read-only, since writing single cells would leave the
+        bitboards out of sync. Assign a whole board to ``board`` instead.
+
+        Returns
+        -------
+        memoryview
+            Read-only board of length ``num_rows * num_cols`` in
+            row-major order.
+        """
+        return self._cells_view
+
+    @board.setter
+    def board(self, board):
+        """
+        Loads the bitboards from a flattened board.
+
+        Parameters
+        ----------
+        board : sequence[int]
+            Board of length ``num_rows * num_cols`` in row-major order,
+            with pieces stacked from the bottom row upwards. Lists,
+            bytes and NumPy arrays such as ``obs["board"]`` are accepted.
+
+        Raises
+        ------
+        ValueError
+            If the board has the wrong length or a cell is not 0, 1 or 2.
+            The environment is left unchanged in that case.
+        """
+        # Convert and check the whole board before any state is touched
+        if isinstance(board, (bytes, bytearray, memoryview)):
+            board = np.frombuffer(board, dtype=np.uint8)
+        board = np.asarray(board).ravel()
+        if board.size != len(self._cells) or board.min() < 0 or board.max() > 2:
+            raise ValueError(
+                f"board must hold {len(self._cells)} cells with values 0, 1 or 2"
+            )
+        cells = board.astype(np.uint8).tobytes()
+
+        self.bb = [0, 0]
+        self.heights = [0] * self.num_cols
+        for col in range(self.num_cols):
+            for row in range(self.num_rows - 1, -1, -1):
+                mark = cells[self._idx(row, col)]
+                if mark == 0:
+                    break
+                self.bb[mark - 1] |= 1 << (col * self._col_stride + self.heights[col])
+                self.heights[col] += 1
+        self._cells[:] = cells
+        self._legal_cache = None
+
+    def __getstate__(self):
+        """
+        Returns the state used by ``pickle`` and ``copy.deepcopy``.
+
+        Memoryviews cannot be pickled, so the read-only board view is
+        left out and rebuilt by ``__setstate__``.
+
+        Returns
+        -------
+        dict
+            Instance attributes without the board view.
+        """
+        state = self.__dict__.copy()
+        del state["_cells_view"]
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled or copied environment.
+
+        Parameters
+        ----------
+        state : dict
+            Instance attributes from ``__getstate__``.
+        """
+        self.__dict__.update(state)
+        self._cells_view = memoryview(self._cells).toreadonly()
+
     # ---------- Pure game logic ----------
 
     def _idx(self, row: int, col: int) -> int:
@@ -157,24 +286,189 @@ class EnvConnect4(gym.Env):
             Row index where the piece will be placed, or -1 if the
             column is full.
         """
-        # Pieces fall to the bottom, so the scan starts from the last row
-        for row in range(self.num_rows - 1, -1, -1):
-            if self.board[self._idx(row, col)] == 0:
-                return row
-        return -1
+        # Rows count from the top, heights from the bottom
+        height = self.heights[col]
+        if height >= self.num_rows:
+            return -1
+        return self.num_rows - 1 - height
 
     def _get_legal_actions(self):
         """
         Returns all legal actions from the current state.
 
-        A column is legal if its top cell is still empty.
+        A column is legal if it is not yet filled up to the top row.
+        The result is cached and only recomputed after a column has
+        been filled or emptied again.
 
         Returns
         -------
-        list[int]
-            List of playable column indices.
+        tuple[int, ...]
+            Playable column indices in increasing order.
         """
-        return [col for col in range(self.num_cols) if self.board[self._idx(0, col)] == 0]
+        if self._legal_cache is None:
+            legal = tuple(
+                col for col in range(self.num_cols) if self.heights[col] < self.num_rows
+            )
+            self._legal_cache = legal
+            self._legal_bits = sum(1 << col for col in legal)
+        return self._legal_cache
+
+    def _get_legal_mask(self) -> int:
+        """
+        Returns the legal actions as a bit mask.
+
+        Bit ``c`` is set if column ``c`` is playable. The mask is
+        refreshed together with the cached legal actions.
+
+        Returns
+        -------
+        int
+            Bit mask of playable columns.
+        """
+        if self._legal_cache is None:
+            self._get_legal_actions()
+        return self._legal_bits
+
+    def legal_actions_mask(self) -> np.ndarray:
+        """
+        Returns the legal actions as a boolean array.
+
+        The array is a read-only view into a table built once per
+        environment, so no array is allocated per call.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array of length ``num_cols``, True for playable columns.
+        """
+        return self._legal_flags[self._get_legal_mask()]
+
+    def _make_move(self, col: int, mark: int):
+        """
+        Drops a piece into a column without any legality checks.
+
+        Parameters
+        ----------
+        col : int
+            Column index. Must not be full.
+        mark : int
+            Player identifier, 1 or 2.
+        """
+        height = self.heights[col]
+        self.bb[mark - 1] |= 1 << (col * self._col_stride + height)
+        self.heights[col] = height + 1
+
+        # Keep the byte view in sync with the bitboards
+        self._cells[self._idx(self.num_rows - 1 - height, col)] = mark
+
+        # The legal set only changes when the column becomes full
+        if self.heights[col] == self.num_rows:
+            self._legal_cache = None
+
+    def _undo_move(self, col: int, mark: int):
+        """
+        Removes the top piece of a column placed by ``_make_move``.
+
+        Parameters
+        ----------
+        col : int
+            Column index. Its top piece must belong to ``mark``.
+        mark : int
+            Player identifier, 1 or 2.
+        """
+        if self.heights[col] == self.num_rows:
+            self._legal_cache = None
+
+        height = self.heights[col] - 1
+        self.heights[col] = height
+        self.bb[mark - 1] &= ~(1 << (col * self._col_stride + height))
+
+        self._cells[self._idx(self.num_rows - 1 - height, col)] = 0
+
+    def state_key(self) -> int:
+        """
+        Packs the current state into a single hashable integer.
+
+        The key concatenates the player 1 bitboard, the player 2
+        bitboard, and a bit for the player to move.
+
+        Returns
+        -------
+        int
+            Integer uniquely identifying the board and turn.
+        """
+        shift = self.num_cols * self._col_stride
+        return self.bb[0] | (self.bb[1] << shift) | ((self.turn - 1) << (2 * shift))
+
+    def canonical_state_key(self):
+        """
+        Packs the current state, folded over the left/right symmetry.
+
+        A position and its mirror image are strategically identical, so
+        both map to the smaller of their two ``state_key`` values. Each
+        column occupies its own bit slice in both bitboards, so the
+        mirror only moves whole slices, both players at once.
+
+        Returns
+        -------
+        tuple[int, bool]
+            Canonical key, and whether it belongs to the mirrored board.
+            When it does, column ``c`` of the canonical board is column
+            ``num_cols - 1 - c`` of the actual one.
+        """
+        stride = self._col_stride
+        shift = self.num_cols * stride
+        turn_bit = (self.turn - 1) << (2 * shift)
+        pieces = self.bb[0] | (self.bb[1] << shift)
+
+        # Bits of column 0 in both bitboards
+        col_bits = ((1 << stride) - 1) * (1 | (1 << shift))
+        last = self.num_cols - 1
+        mirror = 0
+        for col in range(self.num_cols):
+            mirror |= ((pieces >> (col * stride)) & col_bits) << ((last - col) * stride)
+
+        if mirror < pieces:
+            return mirror | turn_bit, True
+        return pieces | turn_bit, False
+
+    def _has_four(self, b: int) -> bool:
+        """
+        Checks whether a bitboard contains four connected pieces.
+
+        Parameters
+        ----------
+        b : int
+            Bitboard of a single player.
+
+        Returns
+        -------
+        bool
+            True if the bitboard has a connect-four, otherwise False.
+        """
+        stride = self._col_stride
+
+        # Straight-line checks, ordered by how often each direction
+        # completes a win in heuristic/random play
+
+        # Horizontal check
+        m = b & (b >> stride)
+        if m & (m >> (2 * stride)):
+            return True
+
+        # Diagonal up-right check
+        m = b & (b >> (stride + 1))
+        if m & (m >> (2 * stride + 2)):
+            return True
+
+        # Diagonal down-right check
+        m = b & (b >> (stride - 1))
+        if m & (m >> (2 * stride - 2)):
+            return True
+
+        # Vertical check
+        m = b & (b >> 1)
+        return bool(m & (m >> 2))
 
     def is_winner(self, mark: int) -> bool:
         """
@@ -191,31 +485,31 @@ class EnvConnect4(gym.Env):
             True if the given player has four connected pieces,
             otherwise False.
         """
-        # Horizontal check
-        for row in range(self.num_rows):
-            for col in range(self.num_cols - 3):
-                if all(self.board[self._idx(row, col + i)] == mark for i in range(4)):
-                    return True
+        return self._has_four(self.bb[mark - 1])
 
-        # Vertical check
-        for row in range(self.num_rows - 3):
-            for col in range(self.num_cols):
-                if all(self.board[self._idx(row + i, col)] == mark for i in range(4)):
-                    return True
+    def is_winning_move(self, mark: int, col: int) -> bool:
+        """
+        Checks whether dropping a piece into a column would win.
 
-        # Diagonal down-right check
-        for row in range(self.num_rows - 3):
-            for col in range(self.num_cols - 3):
-                if all(self.board[self._idx(row + i, col + i)] == mark for i in range(4)):
-                    return True
+        The board is not modified.
 
-        # Diagonal up-right check
-        for row in range(3, self.num_rows):
-            for col in range(self.num_cols - 3):
-                if all(self.board[self._idx(row - i, col + i)] == mark for i in range(4)):
-                    return True
+        Parameters
+        ----------
+        mark : int
+            Player identifier, usually 1 or 2.
+        col : int
+            Column index. Must not be full.
 
-        return False
+        Returns
+        -------
+        bool
+            True if the move gives the player four connected pieces,
+            otherwise False.
+        """
+        # NumPy integers would turn the probe into fixed-width arithmetic
+        col = int(col)
+        bit = 1 << (col * self._col_stride + self.heights[col])
+        return self._has_four(self.bb[mark - 1] | bit)
 
     # ---------- Gym step() ----------
 
@@ -234,51 +528,66 @@ class EnvConnect4(gym.Env):
             Observation, reward, terminated flag, truncated flag,
             and info dictionary.
         """
-        legal = self._get_legal_actions()
+        _, reward, terminated = self.step_fast(action)
 
-        # Illegal move: the acting player immediately loses
-        if action not in legal:
-            terminated = True
-            truncated = False
-            reward = -1.0
+        # The turn only passes on when the game continues, so a positive
+        # reward belongs to the player still to move, a negative one to the other
+        winner = 0
+        if reward > 0:
+            winner = self.turn
+        elif reward < 0:
             winner = 2 if self.turn == 1 else 1
-            return self._get_obs(), reward, terminated, truncated, self._get_info(winner=winner, is_draw=False)
+        is_draw = terminated and reward == 0
+
+        return self._get_obs(), reward, terminated, False, self._get_info(winner=winner, is_draw=is_draw)
+
+    def step_fast(self, action: int):
+        """
+        Executes one move without building an observation or info dict.
+
+        The game logic and rewards are those of ``step``. Episodes never
+        truncate, so a single done flag is returned.
+
+        Parameters
+        ----------
+        action : int
+            Column selected by the acting player.
+
+        Returns
+        -------
+        tuple
+            The read-only ``board`` view, updated in place, the
+            reward of the acting player, and whether the game is over.
+        """
+        # NumPy integers, e.g. from action_space.sample(), would turn the
+        # bitboards into fixed-width integers that overflow when packed
+        action = int(action)
+
+        # Illegal move: the acting player immediately loses
+        if not (0 <= action < self.num_cols and (self._get_legal_mask() >> action) & 1):
+            return self._cells_view, -1.0, True
 
         self.count_moves += 1
 
         row = self._get_drop_row(action)
         if row == -1:
             # Defensive fallback in case a full column is somehow selected
-            terminated = True
-            truncated = False
-            reward = -1.0
-            winner = 2 if self.turn == 1 else 1
-            return self._get_obs(), reward, terminated, truncated, self._get_info(winner=winner, is_draw=False)
+            return self._cells_view, -1.0, True
 
         # Apply the move for the current player
-        self.board[self._idx(row, action)] = self.turn
+        self._make_move(action, self.turn)
 
         # Check whether the current player has won
         if self.is_winner(self.turn):
-            terminated = True
-            truncated = False
-            reward = +1.0
-            winner = self.turn
-            return self._get_obs(), reward, terminated, truncated, self._get_info(winner=winner, is_draw=False)
+            return self._cells_view, +1.0, True
 
         # If no legal actions remain, the game is a draw
         if len(self._get_legal_actions()) == 0:
-            terminated = True
-            truncated = False
-            reward = 0.0
-            return self._get_obs(), reward, terminated, truncated, self._get_info(winner=0, is_draw=True)
+            return self._cells_view, 0.0, True
 
         # Otherwise, switch to the other player and continue
         self.turn = 2 if self.turn == 1 else 1
-        terminated = False
-        truncated = False
-        reward = 0.0
-        return self._get_obs(), reward, terminated, truncated, self._get_info(winner=0, is_draw=False)
+        return self._cells_view, 0.0, False
 
     # ---------- Console helper ----------
 
@@ -294,25 +603,23 @@ class EnvConnect4(gym.Env):
         The board is printed from top row to bottom row for a natural
         Connect 4 display.
         """
-        print(f"\nBoard after {self.count_moves} moves:")
-
-        # Print column indices for user reference
-        print("  ".join(map(str, range(self.num_cols))))
-        print("-" * (self.num_cols * 3))
-
+        board = self.board
+        cells = (self.empty_emoji, self.player1_emoji, self.player2_emoji)
+
+        lines = [
+            "",
+            f"Board after {self.count_moves} moves:",
+            # Column indices for user reference
+            "  ".join(map(str, range(self.num_cols))),
+            "-" * (self.num_cols * 3),
+        ]
         for r in range(self.num_rows):
-            row_cells = []
-            for c in range(self.num_cols):
-                v = self.board[self._idx(r, c)]
-                if v == 1:
-                    row_cells.append(self.player1_emoji)
-                elif v == 2:
-                    row_cells.append(self.player2_emoji)
-                else:
-                    row_cells.append(self.empty_emoji)
-            print(" ".join(row_cells))
-
-        print()
+            start = self._idx(r, 0)
+            lines.append(" ".join(cells[v] for v in board[start:start + self.num_cols]))
+        lines.append("")
+
+        # Emit the whole board with a single write
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def check(self):
         """
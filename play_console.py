@@ -69,14 +69,16 @@ def play(env, opponents_policy=None, show_q_values: bool = False):
                 )
 
                 # Optionally display Q-values for the current state
-                if show_q_values and hasattr(opponents_policy, "Q"):
-                    s = tuple(observation["board"]) + (int(observation["turn"]),)
-                    if s in opponents_policy.Q:
+                if show_q_values and hasattr(opponents_policy, "q_values"):
+                    s, mirrored = opponents_policy._oriented_state_key(env, observation)
+                    q = opponents_policy.q_values(s)
+                    if q is not None:
                         legal_actions = env._get_legal_actions()
-                        action_info = {
-                            env.col_id_to_name[a]: f"{float(opponents_policy.Q[s][a]):.4f}"
-                            for a in legal_actions
-                        }
+                        action_info = {}
+                        for a in legal_actions:
+                            # Rows are stored for the canonical board, so map columns across
+                            q_col = opponents_policy._mirror_action(a) if mirrored else a
+                            action_info[env.col_id_to_name[a]] = f"{float(q[q_col]):.4f}"
                         print("Q-values:", action_info)
 
             observation, reward, terminated, truncated, info = env.step(action)
@@ -85,9 +87,11 @@ def play(env, opponents_policy=None, show_q_values: bool = False):
         # Final board and result after the game ends
         env.print_current_board()
 
-        if env.is_winner(mark=1):
+        # The final step already reports the winner, so no board rescan is needed
+        winner = info["winner"]
+        if winner == 1:
             result = "X wins!"
-        elif env.is_winner(mark=2):
+        elif winner == 2:
             result = "O wins!"
         else:
             result = "Draw"
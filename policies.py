@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Hashable
 
 
 class PolicyRandom:
@@ -7,14 +7,41 @@ class PolicyRandom:
     Random policy for Connect 4.
 
     This policy selects uniformly at random from the currently
-    legal actions.
+    legal actions. Uniform samples are drawn in large batches and
+    carried over between episodes, so the generator is only called
+    once every ``buffer_size`` moves.
     """
 
-    def __init__(self):
+    def __init__(self, buffer_size: int = 4096):
         """
         Initializes the random policy.
+
+        Parameters
+        ----------
+        buffer_size : int, optional
+            Number of uniform samples drawn at once.
         """
-        pass
+        self.buffer_size = buffer_size
+        self._rng = None
+        self._buf = None
+        self._i = 0
+
+    def reset_episode(self, rng):
+        """
+        Selects the generator used for the coming episode.
+
+        Samples left over from the same generator are kept, so calling
+        this once per episode costs nothing. A different generator
+        discards them, and the next move draws a fresh batch from it.
+
+        Parameters
+        ----------
+        rng : np.random.Generator
+            Generator used for this and any later refills.
+        """
+        if rng is not self._rng:
+            self._rng = rng
+            self._buf = None
 
     def _get_action(self, env, observation=None):
         """
@@ -32,8 +59,17 @@ class PolicyRandom:
         int
             Selected action as a column index.
         """
+        # Refill lazily, from the environment's generator unless one was given
+        if self._buf is None or self._i == len(self._buf):
+            rng = self._rng if self._rng is not None else env.np_random
+            self._buf = rng.random(self.buffer_size)
+            self._i = 0
+
+        u = self._buf[self._i]
+        self._i += 1
+
         legal = env._get_legal_actions()
-        return int(env.np_random.choice(legal))
+        return int(legal[int(u * len(legal))])
 
 
 class PolicyQLearning:
@@ -42,9 +78,22 @@ class PolicyQLearning:
 
     The policy stores action values for state-action pairs and
     follows an epsilon-greedy action selection rule.
+
+    Action values live in one contiguous ``Q_table`` array with a row
+    per visited state. ``_id`` maps each state key to its row, and the
+    array doubles in size whenever it runs out of rows. All states of
+    the first few plies are registered up front, since every episode
+    passes through them.
+
+    A position and its mirror image share one row. Rows are stored in
+    the orientation of the canonical position, so actions are mirrored
+    on the way in and out whenever the actual board is the mirrored one.
     """
 
-    def __init__(self, env, alpha=0.1, gamma=0.99, epsilon=1.0, seed: int = 7):
+    initial_capacity = 65536
+
+    def __init__(self, env, alpha=0.1, gamma=0.99, epsilon=1.0, seed: int = 7,
+                 opening_depth: int = 4):
         """
         Initializes the Q-learning policy.
 
@@ -60,43 +109,197 @@ class PolicyQLearning:
             Exploration rate.
         seed : int, optional
             Random seed used for action selection.
+        opening_depth : int, optional
+            Number of opening plies whose states are registered in the
+            Q-table at construction time.
         """
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
         self.rng = np.random.default_rng(seed)
 
-        # Maps a state key to a vector of action values
-        self.Q: Dict[Tuple[int, ...], np.ndarray] = {}
-        self.n_actions = env.action_space.n
+        # Discount factor in the table's precision, so updates stay float32
+        self._gamma_f = np.float32(gamma)
+
+        self.n_actions = int(env.action_space.n)
+
+        # Maps a state key to its row of action values in Q_table
+        self._id: Dict[Hashable, int] = {}
+        self.Q_table = np.zeros((self.initial_capacity, self.n_actions), dtype=np.float32)
 
-    def _state_key(self, observation):
+        # Reusable buffer for masking out illegal actions
+        self._q_scratch = np.empty(self.n_actions, dtype=np.float32)
+
+        self._register_opening_states(env, opening_depth)
+
+    def _register_opening_states(self, env, depth: int):
         """
-        Converts an observation into a hashable state key.
+        Registers every state reachable within ``depth`` plies.
+
+        The states are enumerated on a scratch copy of the environment, so
+        the given environment is left untouched.
 
         Parameters
         ----------
-        observation : dict
-            Observation containing the board and the current turn.
+        env : EnvConnect4
+            Connect 4 environment whose type is used for the scratch copy.
+        depth : int
+            Number of plies to enumerate.
+        """
+        if depth <= 0:
+            return
+
+        scratch = type(env)()
+        scratch.reset()
+        seen = set()
+
+        def visit(remaining):
+            # Transpositions reach the same position, so register each once
+            key = scratch.state_key()
+            if key in seen:
+                return
+            seen.add(key)
+            self._ensure(self._state_key(scratch, scratch._get_obs()))
+            if remaining == 0:
+                return
+
+            mark = scratch.turn
+            for col in scratch._get_legal_actions():
+                # Positions after a winning move are never acted on
+                if scratch.is_winning_move(mark, col):
+                    continue
+                scratch._make_move(col, mark)
+                scratch.turn = 2 if mark == 1 else 1
+                visit(remaining - 1)
+                scratch.turn = mark
+                scratch._undo_move(col, mark)
+
+        visit(depth)
+
+    def _oriented_state_key(self, env, observation=None):
+        """
+        Returns a hashable key for the current state and its orientation.
+
+        The key is the packed bitboard integer from the environment,
+        folded over the left/right symmetry, so no per-cell tuple has
+        to be built or hashed.
+
+        Parameters
+        ----------
+        env : EnvConnect4
+            Connect 4 environment, positioned at the state to encode.
+        observation : dict, optional
+            Current observation. Not needed for this policy.
 
         Returns
         -------
-        tuple[int, ...]
+        tuple[int, bool]
+            Hashable representation of the state, and whether its
+            Q-row is stored in mirrored column order.
+        """
+        return env.canonical_state_key()
+
+    def _state_key(self, env, observation=None):
+        """
+        Returns a hashable key for the current state.
+
+        Parameters
+        ----------
+        env : EnvConnect4
+            Connect 4 environment, positioned at the state to encode.
+        observation : dict, optional
+            Current observation.
+
+        Returns
+        -------
+        hashable
             Hashable representation of the state.
         """
-        return tuple(observation["board"]) + (int(observation["turn"]),)
+        return self._oriented_state_key(env, observation)[0]
+
+    def _mirror_action(self, a: int) -> int:
+        """
+        Maps a column to its mirror image.
+
+        Parameters
+        ----------
+        a : int
+            Column index.
+
+        Returns
+        -------
+        int
+            Column index on the other side of the central column.
+        """
+        return self.n_actions - 1 - a
 
-    def _ensure(self, s: Tuple[int, ...]):
+    def _ensure(self, s) -> int:
         """
         Ensures that a state exists in the Q-table.
 
+        Unseen states get the next free row, initialized to zero.
+
+        Parameters
+        ----------
+        s : hashable
+            State key.
+
+        Returns
+        -------
+        int
+            Row index of the state in ``Q_table``.
+        """
+        # A single hash lookup both finds known states and registers new ones
+        row = self._id.setdefault(s, len(self._id))
+        if row == self.Q_table.shape[0]:
+            grown = np.zeros((2 * row, self.n_actions), dtype=np.float32)
+            grown[:row] = self.Q_table
+            self.Q_table = grown
+        return row
+
+    def q_values(self, s):
+        """
+        Returns the stored action values of a state.
+
         Parameters
         ----------
-        s : tuple[int, ...]
+        s : hashable
             State key.
+
+        Returns
+        -------
+        np.ndarray or None
+            View of the state's row in ``Q_table``, or None if the
+            state has never been visited.
         """
-        if s not in self.Q:
-            self.Q[s] = np.zeros(self.n_actions, dtype=np.float32)
+        row = self._id.get(s)
+        if row is None:
+            return None
+        return self.Q_table[row]
+
+    def _masked_q(self, row: int, mask):
+        """
+        Returns a row of action values with illegal actions set to -inf.
+
+        The values are written into a shared scratch buffer that is
+        overwritten on every call, so the stored row stays untouched.
+
+        Parameters
+        ----------
+        row : int
+            Row index in ``Q_table``.
+        mask : np.ndarray
+            Boolean array of length ``n_actions``, True for legal actions.
+
+        Returns
+        -------
+        np.ndarray
+            Masked copy of the action values.
+        """
+        q = self._q_scratch
+        q.fill(-np.inf)
+        np.copyto(q, self.Q_table[row], where=mask)
+        return q
 
     def _get_action(self, env, observation):
         """
@@ -104,7 +307,8 @@ class PolicyQLearning:
 
         With probability epsilon, the policy explores by choosing
         a random legal action. Otherwise, it exploits by choosing
-        the legal action with the highest Q-value.
+        the legal action with the highest Q-value. On a mirrored state
+        the choice is made on the canonical board and mapped back.
 
         Parameters
         ----------
@@ -118,54 +322,70 @@ class PolicyQLearning:
         int
             Selected action as a column index.
         """
-        s = self._state_key(observation)
-        self._ensure(s)
-
-        legal = env._get_legal_actions()
+        s, mirrored = self._oriented_state_key(env, observation)
+        row = self._ensure(s)
 
-        # Exploration step
+        # Exploration step, drawing the same stream as rng.choice(legal)
         if self.rng.random() < self.epsilon:
-            return int(self.rng.choice(legal))
+            legal = env._get_legal_actions()
+            return int(legal[self.rng.integers(len(legal))])
 
         # Exploitation step with illegal actions masked out
-        q = self.Q[s].copy()
-        for a in range(self.n_actions):
-            if a not in legal:
-                q[a] = -np.inf
-        return int(np.argmax(q))
+        mask = env.legal_actions_mask()
+        if not mirrored:
+            return int(self._masked_q(row, mask).argmax())
+        return self._mirror_action(int(self._masked_q(row, mask[::-1]).argmax()))
 
-    def update(self, s, a, r, s_next, legal_next, done: bool):
+    def update(self, s, a, r, s_next, legal_next, done: bool,
+               mirrored: bool = False, mirrored_next: bool = False):
         """
         Updates the Q-value for a state-action pair.
 
+        Actions are given on the actual boards and mapped to the
+        orientation of each state key as needed.
+
         Parameters
         ----------
-        s : tuple[int, ...]
+        s : hashable
             Current state.
         a : int
             Action taken in the current state.
         r : float
             Reward received.
-        s_next : tuple[int, ...]
-            Next state.
+        s_next : hashable
+            Next state. Not looked up when ``done`` is True.
         legal_next : list[int]
             Legal actions in the next state.
         done : bool
             Whether the next state is terminal.
+        mirrored : bool, optional
+            Whether the row of ``s`` is stored in mirrored column order.
+        mirrored_next : bool, optional
+            Whether the row of ``s_next`` is stored in mirrored column order.
         """
-        self._ensure(s)
-        self._ensure(s_next)
+        row = self._ensure(s)
 
+        if mirrored:
+            a = self._mirror_action(a)
+
+        Q = self.Q_table
+
+        # Terminal states are never acted on, so they get no row of their own
         if done:
-            target = float(r)
+            target = np.float32(r)
         else:
-            q_next = self.Q[s_next].copy()
-            for aa in range(self.n_actions):
-                if aa not in legal_next:
-                    q_next[aa] = -np.inf
-            target = float(r) + self.gamma * float(np.max(q_next))
+            row_next = self._ensure(s_next)
+            if mirrored_next:
+                legal_next = [self._mirror_action(c) for c in legal_next]
+            # The best legal value is read from the row as plain floats,
+            # which is cheaper than masking a scratch copy for a single max
+            q_next = Q[row_next].tolist()
+            target = np.float32(r) + self._gamma_f * max(map(q_next.__getitem__, legal_next))
 
-        self.Q[s][a] = self.Q[s][a] + self.alpha * (target - self.Q[s][a])
+        # Read the current value once and write the result straight back,
+        # keeping the whole update in float32 scalars
+        q_sa = Q[row, a]
+        Q[row, a] = q_sa + self.alpha * (target - q_sa)
 
 
 class PolicyHeuristic:
@@ -190,7 +410,29 @@ class PolicyHeuristic:
         """
         self.rng = np.random.default_rng(seed)
 
-    def _get_action(self, env, observation):
+        # Center-preferred columns per legal set, filled on first use
+        self._center_moves: Dict[tuple, tuple] = {}
+
+    def _pick(self, moves):
+        """
+        Picks one of the given moves uniformly at random.
+
+        Draws the same random stream as ``rng.choice(moves)`` without
+        converting the moves into a NumPy array.
+
+        Parameters
+        ----------
+        moves : sequence[int]
+            Non-empty sequence of column indices.
+
+        Returns
+        -------
+        int
+            Selected column index.
+        """
+        return int(moves[self.rng.integers(len(moves))])
+
+    def _get_action(self, env, observation=None):
         """
         Selects an action according to the heuristic rules.
 
@@ -198,8 +440,9 @@ class PolicyHeuristic:
         ----------
         env : EnvConnect4
             Connect 4 environment.
-        observation : dict
-            Current observation.
+        observation : dict, optional
+            Current observation. If None, the player to move is read
+            from the environment.
 
         Returns
         -------
@@ -207,52 +450,32 @@ class PolicyHeuristic:
             Selected action as a column index.
         """
         legal = env._get_legal_actions()
-        player = observation["turn"]
+        player = env.turn if observation is None else observation["turn"]
         opponent = 2 if player == 1 else 1
 
         # Step 1: check for an immediate winning move
-        winning_moves = []
-        for col in legal:
-            row = env._get_drop_row(col)
-            idx = env._idx(row, col)
-
-            env.board[idx] = player
-            if env.is_winner(player):
-                winning_moves.append(col)
-            env.board[idx] = 0
+        winning_moves = [col for col in legal if env.is_winning_move(player, col)]
 
         if winning_moves:
-            return int(self.rng.choice(winning_moves))
+            return self._pick(winning_moves)
 
         # Step 2: check whether the opponent has an immediate winning move
-        blocking_moves = []
-        for col in legal:
-            row = env._get_drop_row(col)
-            idx = env._idx(row, col)
-
-            env.board[idx] = opponent
-            if env.is_winner(opponent):
-                blocking_moves.append(col)
-            env.board[idx] = 0
+        blocking_moves = [col for col in legal if env.is_winning_move(opponent, col)]
 
         if blocking_moves:
-            return int(self.rng.choice(blocking_moves))
+            return self._pick(blocking_moves)
 
         # Step 3: prefer moves closer to the center column
-        center = env.num_cols // 2
-        best_score = -float("inf")
-        best_moves = []
-
-        for col in legal:
-            score = -abs(col - center)
-            if score > best_score:
-                best_score = score
-                best_moves = [col]
-            elif score == best_score:
-                best_moves.append(col)
+        # The ranking only depends on the legal set, so it is computed once per set
+        best_moves = self._center_moves.get(legal)
+        if best_moves is None:
+            center = env.num_cols // 2
+            best_dist = min((abs(col - center) for col in legal), default=None)
+            best_moves = tuple(col for col in legal if abs(col - center) == best_dist)
+            self._center_moves[legal] = best_moves
 
         if best_moves:
-            return int(self.rng.choice(best_moves))
+            return self._pick(best_moves)
 
         # Step 4: random fallback
-        return int(self.rng.choice(legal))
+        return self._pick(legal)
@@ -10,8 +10,11 @@
 import argparse                      # CLI argument handling
 import random                        # Random opponent mixing + seeding
 import pickle                        # Saving/loading Q-table
+import queue                         # Progress records for the logger thread
+import threading                     # Background logger thread
 from typing import Optional, List, Tuple  # Type hints for clarity
-from dataclasses import dataclass    # Parameter container
+from dataclasses import dataclass, replace  # Parameter container (+ per-worker copies)
+from concurrent.futures import ProcessPoolExecutor  # Parallel training workers
 
 import numpy as np                   # Efficient board/feature ops
 import matplotlib.pyplot as plt      # Learning curve visualization
@@ -25,6 +28,7 @@ from policies import PolicyQLearning, PolicyHeuristic, PolicyRandom  # Base poli
 # ----------------------------
 ROWS = 6   # Standard Connect-4 board height
 COLS = 7   # Standard Connect-4 board width
+WIN_WINDOW = 1000   # Episodes in the moving win-rate window
 
 
 # ----------------------------
@@ -32,173 +36,195 @@ COLS = 7   # Standard Connect-4 board width
 # Replaces raw board tuple — collapses trillions of states into
 # ~300k meaningful strategic states the agent can actually learn from.
 # ----------------------------
+# Flat index of the mirrored cell, for every cell
+_MIRROR_IDX = tuple(r * COLS + (COLS - 1 - c) for r in range(ROWS) for c in range(COLS))
+
+def _mirror_board(board: list) -> list:
+    """Board mirrored across the vertical axis."""
+    return [board[i] for i in _MIRROR_IDX]                # Plain gather, no array round-trip
+
 def _canonical_board(board: list) -> tuple:
     """Return left-right canonical form (smaller of board vs mirror)."""
-    arr    = np.array(board).reshape(ROWS, COLS)        # Convert to 2D grid
-    mirror = np.fliplr(arr).flatten().tolist()          # Mirror across vertical axis
+    mirror = _mirror_board(board)                       # Mirror across vertical axis
     return tuple(board) if board <= mirror else tuple(mirror)  # Choose canonical symmetric form
 
 def _canonical_action(board: list, action: int) -> int:
     """Mirror action if board was mirrored."""
-    arr    = np.array(board).reshape(ROWS, COLS)        # Convert to 2D grid
-    mirror = np.fliplr(arr).flatten().tolist()          # Mirror board for comparison
-    if board <= mirror:                                 # If original is canonical
+    if board <= _mirror_board(board):                   # If original is canonical
         return action                                   # Action unchanged
     return (COLS - 1) - action                           # Mirror the column index
 
-def _col_height(board: list, col: int) -> int:
-    """Number of pieces in column (board stored row-major, row 0 = top)."""
-    return sum(1 for r in range(ROWS) if board[r * COLS + col] != 0)  # Count non-empty cells in col
-
-def _count_n_in_a_row(board: list, piece: int, n: int) -> int:
-    """Count windows of exactly n pieces + (4-n) empties."""
-    arr   = np.array(board).reshape(ROWS, COLS)         # 2D board
-    empty = 0                                           # Empty cell marker
-    count = 0                                           # Total matching windows
-
-    def chk(w):
-        return w.count(piece) == n and w.count(empty) == (4 - n)  # Pattern definition (n pieces + rest empty)
-
-    for c in range(COLS - 3):
-        for r in range(ROWS):
-            if chk([arr[r, c + i] for i in range(4)]): count += 1  # Horizontal windows
-
-    for c in range(COLS):
-        for r in range(ROWS - 3):
-            if chk([arr[r + i, c] for i in range(4)]): count += 1  # Vertical windows
-
-    for c in range(COLS - 3):
-        for r in range(ROWS - 3):
-            if chk([arr[r + i, c + i] for i in range(4)]): count += 1  # Diagonal ↘ windows
-
-    for c in range(COLS - 3):
-        for r in range(3, ROWS):
-            if chk([arr[r - i, c + i] for i in range(4)]): count += 1  # Diagonal ↗ windows
-
-    return count                                           # Return number of matching windows
+def _build_win_lines() -> Tuple[Tuple[int, int, int, int], ...]:
+    """Flat board indices of every 4-cell window (69 on a 6x7 board)."""
+    lines = []                                          # Window index tuples
+    for r in range(ROWS):
+        for c in range(COLS - 3):
+            lines.append(tuple(r * COLS + c + i for i in range(4)))              # Horizontal windows
+    for r in range(ROWS - 3):
+        for c in range(COLS):
+            lines.append(tuple((r + i) * COLS + c for i in range(4)))            # Vertical windows
+    for r in range(ROWS - 3):
+        for c in range(COLS - 3):
+            lines.append(tuple((r + i) * COLS + c + i for i in range(4)))        # Diagonal ↘ windows
+    for r in range(3, ROWS):
+        for c in range(COLS - 3):
+            lines.append(tuple((r - i) * COLS + c + i for i in range(4)))        # Diagonal ↗ windows
+    return tuple(lines)
+
+WIN_LINES     = _build_win_lines()                         # Precomputed once at import
+WIN_LINES_IDX = np.array(WIN_LINES, dtype=np.intp)         # (69, 4) gather index for vectorized counting
+
+# Cell weights per acting player: own piece → 1, opponent piece → 5, so a
+# window sum of n (own) or 5n (opponent) means the rest of it is empty.
+_WINDOW_WEIGHTS = {
+    1: np.array([0, 1, 5], dtype=np.intp),
+    2: np.array([0, 5, 1], dtype=np.intp),
+}
+
+def _count_open_windows(board: list, piece: int) -> Tuple[int, int, int, int]:
+    """
+    Count windows of exactly n pieces + (4-n) empties for both players.
+    Returns (piece 2-in-a-row, piece 3-in-a-row, opp 2-in-a-row, opp 3-in-a-row).
+    """
+    cells  = _WINDOW_WEIGHTS[piece][board]                      # Weighted board (single C call)
+    counts = np.bincount(cells[WIN_LINES_IDX].sum(axis=1), minlength=21)  # Histogram of window sums
+    return int(counts[2]), int(counts[3]), int(counts[10]), int(counts[15])
 
 def _immediate_win_cols(env: EnvConnect4, piece: int) -> List[int]:
     """Columns where piece wins immediately."""
-    wins = []                                              # Winning columns accumulator
-    for col in env._get_legal_actions():                    # Iterate all legal actions
-        row = env._get_drop_row(col)                        # Simulated landing row
-        if row == -1:
-            continue                                        # Skip full columns (safety)
-        idx = env._idx(row, col)                            # Convert (row,col) to index
-        env.board[idx] = piece                              # Temporarily place piece
-        if env.is_winner(piece):
-            wins.append(col)                                # Record immediate winning action
-        env.board[idx] = 0                                  # Undo simulation
-    return wins                                             # Return list of winning columns
-
-def board_to_features(board: list, turn: int, env: EnvConnect4) -> tuple:
+    return [col for col in env._get_legal_actions()
+            if env.is_winning_move(piece, col)]             # Bitboard probe, no board mutation
+
+def board_to_features(board: list, turn: int, env: EnvConnect4) -> bytes:
     """
     30-feature strategic state key (see feature list in qlearning_v4.py).
     Same board position with irrelevant cell differences → same key.
+    Every feature fits in a byte, so the key is packed into a 30-byte string.
     """
     cb    = list(_canonical_board(board))                   # Canonicalize board (symmetry)
     piece = turn                                            # Current player piece (1 or 2)
     opp   = 2 if turn == 1 else 1                           # Opponent piece id
 
+    mirrored = cb != board                                  # Canonical columns run right-to-left
+
+    # Threats, heights and center are read off the bitboards of an env holding the position
+    on_env = env.board == bytearray(board)                  # Env already holds this position?
+    if not on_env:
+        orig = bytes(env.board)                             # Backup env board (the view is live)
+        env.board = cb                                      # Use canonical board for threat checks
+    agent_threats = _immediate_win_cols(env, piece)         # Agent immediate winning moves
+    opp_threats   = _immediate_win_cols(env, opp)           # Opponent immediate winning moves
+    heights = list(env.heights)                             # Pieces per column, no cell scan
+    stride  = env._col_stride                               # Bits per bitboard column
+    center_bits = ((1 << stride) - 1) << (3 * stride)       # Bits of the center column (col 3)
+    own_center  = env.bb[piece - 1] & center_bits           # Agent pieces in the center
+    opp_center  = env.bb[opp - 1] & center_bits             # Opponent pieces in the center
+    if not on_env:
+        env.board = orig                                    # Restore env board
+    elif mirrored:
+        agent_threats = [(COLS - 1) - c for c in agent_threats]  # Map to canonical columns
+        opp_threats   = [(COLS - 1) - c for c in opp_threats]
+        heights.reverse()
+
     feats = [int(turn)]                                     # Feature 1: whose turn
 
     # Column heights bucketed (0-3)
-    for c in range(COLS):
-        feats.append(min(_col_height(cb, c) // 2, 3))       # Coarse height buckets to reduce state variance
+    for h in heights:
+        feats.append(min(h // 2, 3))                        # Coarse height buckets to reduce state variance
 
     # Agent 2/3-in-a-row (capped)
-    feats.append(min(_count_n_in_a_row(cb, piece, 2), 8))   # Count potential 2-in-a-row windows
-    feats.append(min(_count_n_in_a_row(cb, piece, 3), 4))   # Count potential 3-in-a-row windows
+    own2, own3, opp2, opp3 = _count_open_windows(cb, piece)  # All window counts in one pass
+    feats.append(min(own2, 8))                              # Count potential 2-in-a-row windows
+    feats.append(min(own3, 4))                              # Count potential 3-in-a-row windows
 
     # Agent immediate win threats (capped at 3)
-    # Temporarily swap env board for counting
-    orig = env.board[:]                                     # Backup env board
-    env.board = cb[:]                                       # Use canonical board for threat checks
-    agent_threats = _immediate_win_cols(env, piece)         # Agent immediate winning moves
-    opp_threats   = _immediate_win_cols(env, opp)           # Opponent immediate winning moves
-    env.board = orig                                        # Restore env board
-
     feats.append(min(len(agent_threats), 3))                # Feature: number of agent immediate wins (capped)
 
     # Opp 2/3-in-a-row (capped)
-    feats.append(min(_count_n_in_a_row(cb, opp, 2), 8))      # Opponent 2-in-a-row windows
-    feats.append(min(_count_n_in_a_row(cb, opp, 3), 4))      # Opponent 3-in-a-row windows
+    feats.append(min(opp2, 8))                               # Opponent 2-in-a-row windows
+    feats.append(min(opp3, 4))                               # Opponent 3-in-a-row windows
     feats.append(min(len(opp_threats),   3))                 # Opponent immediate win count (capped)
 
-    # Center column occupancy (col 3)
-    center = [cb[r * COLS + 3] for r in range(ROWS) if cb[r * COLS + 3] != 0]  # Extract filled center cells
-    if not center:
+    # Center column occupancy (col 3, unchanged by mirroring)
+    if not own_center and not opp_center:
         feats.append(0)                                     # Center empty
-    elif all(p == piece for p in center):
+    elif not opp_center:
         feats.append(1)                                     # Center controlled by agent
-    elif all(p == opp for p in center):
+    elif not own_center:
         feats.append(2)                                     # Center controlled by opponent
     else:
         feats.append(3)                                     # Mixed occupancy
 
     # Per-column win flags
-    legal_set = set(env._get_legal_actions() if env.board == board else
-                    [c for c in range(COLS) if cb[c] == 0])   # Approx legal cols when using canonical board
     for c in range(COLS):
         feats.append(1 if c in agent_threats else 0)         # Binary flags: agent immediate win in col c
     for c in range(COLS):
         feats.append(1 if c in opp_threats else 0)           # Binary flags: opp immediate win in col c
 
     # Game phase
-    total = sum(1 for x in cb if x != 0)                     # Total stones placed so far
+    total = sum(heights)                                     # Total stones placed so far
     feats.append(min(total // 4, 10))                        # Coarse phase indicator (early→late)
 
-    return tuple(feats)                                      # Final feature key (hashable)
+    return bytes(feats)                                      # Final feature key (compact, hashable, indexable)
+
+
+# Per-column immediate-win flags inside a feature key (canonical orientation):
+# first for the side to move, then for the other player
+MOVER_WIN_FLAGS = slice(15, 15 + COLS)
+OTHER_WIN_FLAGS = slice(15 + COLS, 15 + 2 * COLS)
 
 
 # ----------------------------
 # Improved PolicyQLearning wrapper
-# Overrides _state_key to use feature-based representation.
+# Overrides _oriented_state_key to use feature-based representation.
 # Everything else (update, _get_action) stays from policies.py.
 # ----------------------------
 class PolicyQLearningV4(PolicyQLearning):
     """
     Drop-in replacement for PolicyQLearning with feature-based state key.
-    Attach env reference so feature extractor can use env helpers.
+    The env passed to _oriented_state_key lends its helpers to the feature extractor.
+    Feature keys are folded by _canonical_board already, but their Q-rows keep
+    actual column order, so no action mirroring is reported.
     """
     def __init__(self, env: EnvConnect4, alpha=0.1, gamma=0.99,
-                 epsilon=1.0, seed: int = 42):
+                 epsilon=1.0, seed: int = 42, opening_depth: int = 4):
         super().__init__(env, alpha=alpha, gamma=gamma,
-                         epsilon=epsilon, seed=seed)        # Initialize base Q-learning policy
-        self._env_ref = env                                  # Keep env reference for feature extraction
-
-    def _state_key(self, observation):
-        board = list(observation["board"])                   # Extract board from observation
-        turn  = int(observation["turn"])                     # Extract current turn
-        return board_to_features(board, turn, self._env_ref)  # Convert board to compact feature key
-
-    def _get_action(self, env, observation):
-        s     = self._state_key(observation)                 # Compute state key (feature-based)
-        legal = env._get_legal_actions()                      # Current legal moves
-        self._ensure(s)                                       # Ensure Q-table has an entry for state
-
-        if self.rng.random() < self.epsilon:
-            return int(self.rng.choice(legal))               # Exploration: random legal action
-
-        # Canonical action mapping for symmetry (FIX C)
-        board = list(observation["board"])                   # Raw board (for legality masking)
-        q     = self.Q[s].copy()                              # Copy Q-values for masking
-        for a in range(self.n_actions):
-            if a not in legal:
-                q[a] = -np.inf                               # Mask illegal actions
-        return int(np.argmax(q))                              # Exploitation: best legal action
+                         epsilon=epsilon, seed=seed,
+                         opening_depth=opening_depth)       # Initialize base Q-learning policy
+
+    def _oriented_state_key(self, env, observation=None):
+        if observation is None:
+            board = list(env.board)                          # No observation: read the env directly
+            turn  = env.turn
+        else:
+            board = observation["board"].tolist()            # Extract board from observation
+            turn  = int(observation["turn"])                 # Extract current turn
+        return board_to_features(board, turn, env), False    # Compact feature key, rows in actual column order
 
     def save(self, filename: str = "q_table.pkl"):
+        n = len(self._id)                                    # Number of used rows
+        data = {"keys": list(self._id), "Q_table": self.Q_table[:n]}  # Row order = insertion order (view pickles as-is)
         with open(filename, "wb") as f:
-            pickle.dump(dict(self.Q), f)                     # Persist Q-table to disk
-        print(f"Saved Q-table → {filename}  (states={len(self.Q)})")  # Log save summary
+            pickle.dump(data, f)                             # Persist Q-table to disk
+        print(f"Saved Q-table → {filename}  (states={n})")   # Log save summary
 
     def load(self, filename: str = "q_table.pkl"):
-        from collections import defaultdict
         with open(filename, "rb") as f:
             data = pickle.load(f)                            # Load stored Q-table
-        self.Q = data                                        # Restore Q-table
-        print(f"Loaded Q-table ← {filename}  (states={len(self.Q)})")  # Log load summary
+        if "Q_table" in data:
+            keys, table = data["keys"], data["Q_table"]       # Array layout
+        else:
+            keys  = list(data)                               # Legacy {state: q-vector} layout
+            table = np.array([data[k] for k in keys], dtype=np.float32).reshape(-1, self.n_actions)
+        self._set_table(keys, table)                         # Replace the current table
+        print(f"Loaded Q-table ← {filename}  (states={len(self._id)})")  # Log load summary
+
+    def _set_table(self, keys, table):
+        """Replace the Q-table with the given keys and their rows, in that order."""
+        cap = max(self.initial_capacity, len(keys))          # Leave room to keep learning
+        self.Q_table = np.zeros((cap, self.n_actions), dtype=np.float32)
+        self.Q_table[:len(keys)] = table                     # Restore action values
+        self._id = {bytes(k): i for i, k in enumerate(keys)}  # Restore state → row mapping (tuple keys packed)
 
 
 # ----------------------------
@@ -207,18 +233,22 @@ class PolicyQLearningV4(PolicyQLearning):
 def _has_safe_move(env: EnvConnect4, acting_piece: int, opp_piece: int) -> bool:
     """True if acting_piece has at least one move that doesn't give opp immediate win."""
     for col in env._get_legal_actions():                     # Check all legal moves
-        row = env._get_drop_row(col)                         # Landing row for this move
-        if row == -1:
-            continue                                         # Skip full columns
-        idx = env._idx(row, col)                             # Convert to board index
-        env.board[idx] = acting_piece                        # Simulate acting player's move
+        env._make_move(col, acting_piece)                    # Simulate acting player's move
         opp_wins = _immediate_win_cols(env, opp_piece)       # Check if opponent then has immediate win
-        env.board[idx] = 0                                   # Undo simulation
+        env._undo_move(col, acting_piece)                    # Undo simulation
         if not opp_wins:
             return True                                      # Found at least one safe action
     return False                                             # No safe action exists
 
 
+def _opponent_action(env: EnvConnect4, heuristic: PolicyHeuristic,
+                     rand_pol: PolicyRandom, heuristic_prob: float) -> int:
+    """Training opponent: heuristic move with probability heuristic_prob, else random."""
+    if random.random() < heuristic_prob:
+        return heuristic._get_action(env)                    # Use heuristic opponent
+    return rand_pol._get_action(env)                         # Use random opponent
+
+
 # ----------------------------
 # Training
 # ----------------------------
@@ -238,26 +268,41 @@ class TrainParams:
     curve_file:    str   = "learning_curve.png"
 
 
-def train(
-    episodes:   int = 200_000,
-    seed:       int = 42,
-    print_every: int = 5_000,
-    q_file:     str = "q_table.pkl",
-    curve_file: str = "learning_curve.png",
-) -> PolicyQLearningV4:
+def _format_progress(tag: str, ep: int, episodes: int, wins: int, losses: int, draws: int,
+                     win_sum: int, window: int, epsilon: float, alpha: float, states: int) -> str:
+    """Format one progress line of the training log."""
+    cum_win = 100.0 * wins / ep                                                            # Cumulative win %
+    mov_win = 100.0 * win_sum / min(ep, window)                                            # Moving win % from the running sum
+    return (
+        f"{tag}Ep {ep:>7}/{episodes} | "
+        f"CumWin%={cum_win:5.2f} | "
+        f"Win(last{window})={mov_win:5.2f}% | "
+        f"W/L/D {wins}/{losses}/{draws} | "
+        f"ε={epsilon:.4f}  α={alpha:.4f} | "
+        f"states={states}"
+    )
+
+
+def _log_worker(log_q: queue.Queue):
+    """Logger thread: format and print queued progress records until the None sentinel."""
+    for record in iter(log_q.get, None):
+        print(_format_progress(*record))                                                   # Log progress snapshot
+
+
+def _run_training(params: TrainParams, tag: str = "",
+                  init: Optional[dict] = None) -> Tuple[PolicyQLearningV4, np.ndarray]:
     """
-    Train and return a PolicyQLearningV4 agent.
-    Importable by play.py:  agent = train(episodes=200000)
+    Run the training loop and return the agent with its moving win-rate curve.
+    tag prefixes every log line, so parallel workers can be told apart.
+    init optionally holds {"keys", "Q_table"} to start from instead of an empty table.
     """
-    params = TrainParams(
-        episodes=episodes, seed=seed,
-        print_every=print_every, q_file=q_file, curve_file=curve_file
-    )                                                        # Bundle training configuration
+    episodes, seed, print_every = params.episodes, params.seed, params.print_every
 
     random.seed(seed)                                        # Seed Python RNG
     np.random.seed(seed)                                     # Seed NumPy RNG
 
     env        = EnvConnect4()                                # Create environment
+    env.reset(seed=seed)                                      # Seed the env generator once; episodes reset unseeded
     heuristic  = PolicyHeuristic(seed=seed)                   # Heuristic opponent policy
     rand_pol   = PolicyRandom()                               # Random opponent policy
 
@@ -268,155 +313,271 @@ def train(
         epsilon = params.epsilon_start,
         seed    = seed,
     )                                                        # Initialize learning agent
+    if init is not None:
+        agent._set_table(init["keys"], init["Q_table"])      # Continue from a merged snapshot
 
     wins = losses = draws = 0                                 # Global outcome counters
-    window = 1000                                             # Moving average window size
-    recent: List[int]   = []                                  # Store recent win indicators
-    curve:  List[float] = []                                  # Store moving win-rate curve
-
-    print(f"Training v4 | episodes={episodes} | ε_decay={params.epsilon_decay} "
-          f"| α {params.alpha_start}→{params.alpha_end} "
+    window = WIN_WINDOW                                       # Moving average window size
+    won_eps = np.zeros(episodes, dtype=np.int8)               # Win indicator per episode (preallocated)
+    curve   = np.empty(episodes, dtype=np.float32)            # Moving win-rate curve (preallocated)
+    win_sum = 0                                               # Wins inside the moving window
+
+    # FIX F: linear alpha decay, evaluated for every episode at once
+    frac        = np.arange(1, episodes + 1) / episodes      # Progress fraction (0→1)
+    alpha_sched = (params.alpha_start + frac * (params.alpha_end - params.alpha_start)).astype(np.float32)  # α per episode, in table precision
+    eps_min, eps_decay = params.epsilon_min, params.epsilon_decay  # Per-step ε decay constants
+
+    print(f"{tag}Training v4 | episodes={episodes} | ε_decay={params.epsilon_decay} "
+          f"| α {params.alpha_start:g}→{params.alpha_end:g} "
           f"| heuristic_prob={params.heuristic_prob}")         # Log configuration header
 
+    # Progress lines are formatted and printed off the training loop
+    log_q  = queue.Queue()                                    # Progress records, None ends the log
+    logger = threading.Thread(target=_log_worker, args=(log_q,), daemon=True)
+    logger.start()                                            # Start the logger thread
+
     for ep in range(1, episodes + 1):                         # Loop over episodes
 
-        # FIX F: linear alpha decay
-        frac        = ep / episodes                           # Progress fraction (0→1)
-        agent.alpha = params.alpha_start + frac * (params.alpha_end - params.alpha_start)  # Decay α
+        agent.alpha = alpha_sched[ep - 1]                     # Scheduled α for this episode
 
         # FIX B: alternate who goes first
-        obs, info = env.reset()                               # Reset environment for new game
-        if ep % 2 == 0:
-            # Agent goes first — make one agent move before the loop
-            pass   # turn starts at 1 already in env          # No-op since env already starts at player 1
+        env.reset()                                           # Reset environment for new game
+        rand_pol.reset_episode(env.np_random)                 # Random opponent draws from the env generator
+        piece     = 1 if ep % 2 != 0 else 2                   # Agent plays X on odd episodes, O on even ones
+        opp_piece = 2 if piece == 1 else 1                    # Opponent id
+        if piece == 2:
+            env.step_fast(_opponent_action(env, heuristic, rand_pol, params.heuristic_prob))  # Opponent opens
 
         episode_over = False                                   # Episode termination flag
-        last_obs     = None                                    # Track last agent state (for opponent win credit)
+        last_s       = None                                    # Track last agent state (for opponent win credit)
         last_action  = None                                    # Track last agent action
+        ep_winner    = 0                                       # Winner id once the game ends
+
+        # Each iteration is one agent move followed by the opponent's reply
+        while not episode_over:
+            # ---- Agent's move ----
+            s   = agent._state_key(env)                      # Current feature-based state key
+            row = agent._ensure(s)                           # Q-row of s (V4 rows keep actual column order)
+
+            # ε-greedy inlined, so the key computed above is not rebuilt
+            if agent.rng.random() < agent.epsilon:
+                legal  = env._get_legal_actions()            # Explore among legal columns
+                action = int(legal[agent.rng.integers(len(legal))])
+            else:
+                action = int(agent._masked_q(row, env.legal_actions_mask()).argmax())  # Best legal column
+
+            last_s      = s                                 # Save last agent state key
+            last_action = action                            # Save last agent action
+
+            # --- Reward shaping BEFORE step ---
+            # Threat scans are already encoded in the feature keys, so read them there
+            is_block   = False                              # Does action block an opponent immediate win?
+            if any(s[OTHER_WIN_FLAGS]):
+                canon_action = _canonical_action(list(env.board), action)  # Action in key orientation
+                is_block     = s[OTHER_WIN_FLAGS.start + canon_action] == 1
+
+            _, reward, terminated = env.step_fast(action)   # Apply action in env (no obs/info dicts)
+            episode_over = terminated                       # Update termination flag
+
+            s_next     = None if terminated else agent._state_key(env)  # Next state key (terminal needs none)
+            legal_next = env._get_legal_actions()           # Legal actions from next state
+
+            if terminated:
+                winner = piece if reward > 0 else (opp_piece if reward < 0 else 0)  # Winner id from acting reward
+                ep_winner = winner
+                if winner == piece:
+                    shaped_reward = +5.0                     # FIX H: strong win reward
+                    wins += 1
+                elif winner != 0:
+                    shaped_reward = -5.0                     # FIX H: strong loss reward (e.g., illegal)
+                    losses += 1
+                else:
+                    shaped_reward = 0.0                      # Draw reward
+                    draws += 1
+            else:
+                # Shaping for non-terminal step
+                block_bonus = +2.0 if is_block else 0.0                                # Reward correct block
 
-        while not episode_over:                                # Step through the game
-            current_turn = env.turn                            # Current player turn (1 or 2)
-            legal        = env._get_legal_actions()             # Legal columns available
+                # Threat penalty only if safe move existed (FIX G)
+                # Opponent is now the side to move in s_next
+                if any(s_next[MOVER_WIN_FLAGS]):                                       # Opp threats after move
+                    threat_penalty = -2.0 if _has_safe_move(env, piece, opp_piece) else 0.0  # Penalize only if avoidable
+                else:
+                    threat_penalty = 0.0                                              # No immediate threat → no penalty
 
-            if not legal:
-                draws += 1                                     # No legal moves means draw
-                break
+                # Offensive nudge: own threats created
+                own_threats  = sum(s_next[OTHER_WIN_FLAGS])                            # Agent threats after move
+                threat_bonus = 0.1 * min(own_threats, 3)                               # Small incentive for pressure
 
-            # ---- Agent's turn (player 1 always, or player 2 on alternating eps) ----
-            agent_turn = (current_turn == 1 and ep % 2 != 0) or \
-                         (current_turn == 2 and ep % 2 == 0)    # Decide whether agent controls this turn
-
-            if agent_turn:
-                s      = agent._state_key(obs)                 # Current feature-based state key
-                action = agent._get_action(env, obs)            # Choose action via ε-greedy policy
-
-                last_obs    = obs                               # Save last agent observation (credit assignment)
-                last_action = action                            # Save last agent action
-
-                # --- Reward shaping BEFORE step ---
-                piece      = current_turn                       # Acting player id (agent side)
-                opp_piece  = 2 if piece == 1 else 1              # Opponent id
-                must_block = _immediate_win_cols(env, opp_piece) # Opponent immediate wins to potentially block
-
-                obs_next, reward, terminated, truncated, info_next = env.step(action)  # Apply action in env
-                episode_over = terminated or truncated           # Update termination flag
-
-                s_next     = agent._state_key(obs_next)          # Next state key for Q-learning update
-                legal_next = info_next["legal_columns"]          # Legal actions from next state
-
-                if terminated:
-                    winner = info_next["winner"]                 # Winner id from env
-                    if winner == piece:
-                        shaped_reward = +5.0                     # FIX H: strong win reward
-                        wins += 1
-                    elif winner != 0:
-                        shaped_reward = -5.0                     # FIX H: strong loss reward (e.g., illegal)
-                        losses += 1
-                    else:
-                        shaped_reward = 0.0                      # Draw reward
-                        draws += 1
-                else:
-                    # Shaping for non-terminal step
-                    block_bonus = +2.0 if (must_block and action in must_block) else 0.0  # Reward correct block
+                shaped_reward = -0.01 + block_bonus + threat_penalty + threat_bonus    # Step cost + shaping
 
-                    # Threat penalty only if safe move existed (FIX G)
-                    opp_threats_after = _immediate_win_cols(env, opp_piece)               # Opp threats after move
-                    if opp_threats_after:
-                        threat_penalty = -2.0 if _has_safe_move(env, piece, opp_piece) else 0.0  # Penalize only if avoidable
-                    else:
-                        threat_penalty = 0.0                                              # No immediate threat → no penalty
+            agent.update(s, action, shaped_reward, s_next, legal_next, episode_over)   # Q-learning update
 
-                    # Offensive nudge: own threats created
-                    own_threats  = _immediate_win_cols(env, piece)                         # Agent threats after move
-                    threat_bonus = 0.1 * min(len(own_threats), 3)                          # Small incentive for pressure
+            # FIX E: epsilon decay per step
+            if agent.epsilon > eps_min:
+                agent.epsilon = max(eps_min, agent.epsilon * eps_decay)               # Decay exploration safely
 
-                    shaped_reward = -0.01 + block_bonus + threat_penalty + threat_bonus    # Step cost + shaping
+            if episode_over:
+                break
 
-                agent.update(s, action, shaped_reward, s_next, legal_next, episode_over)   # Q-learning update
+            # ---- Opponent's reply ----
+            action = _opponent_action(env, heuristic, rand_pol, params.heuristic_prob)  # Heuristic/random mix
+            _, reward, terminated = env.step_fast(action)                              # Apply opponent action
+            episode_over = terminated                                                  # Update termination
+
+            if terminated and reward != 0:
+                ep_winner = opp_piece if reward > 0 else piece                         # Winner id from acting reward
+            if terminated and ep_winner == opp_piece:
+                # Opponent won — punish agent's last action (FIX H)
+                losses += 1
+                if last_s is not None and last_action is not None:
+                    agent.update(last_s, last_action, -5.0,
+                                 None, [], True)                                       # Terminal loss update (no next state needed)
+            elif terminated:
+                if reward == 0:
+                    draws += 1                                                         # Count draws explicitly
 
-                # FIX E: epsilon decay per step
-                if agent.epsilon > params.epsilon_min:
-                    agent.epsilon = max(params.epsilon_min,
-                                        agent.epsilon * params.epsilon_decay)             # Decay exploration safely
+        # Track moving win rate
+        won = 1 if ep_winner in ([1] if ep % 2 != 0 else [2]) else 0                      # Win indicator (agent side)
+        won_eps[ep - 1] = won                                                              # Record episode outcome
+        win_sum += won                                                                     # Episode enters the window
+        if ep > window:
+            win_sum -= int(won_eps[ep - 1 - window])                                       # Oldest episode leaves it
+        curve[ep - 1] = win_sum / min(ep, window)                                          # Moving win-rate in O(1)
 
-                obs = obs_next                                                             # Advance observation
+        if ep % print_every == 0:
+            log_q.put_nowait((tag, ep, episodes, wins, losses, draws, win_sum, window,
+                              agent.epsilon, agent.alpha, len(agent._id)))                 # Hand the snapshot to the logger
 
-            else:
-                # ---- Opponent's turn ----
-                if random.random() < params.heuristic_prob:
-                    action = heuristic._get_action(env, obs)                               # Use heuristic opponent
-                else:
-                    action = rand_pol._get_action(env, obs)                                # Use random opponent
+    log_q.put(None)                                                                        # Sentinel: no more records
+    logger.join()                                                                          # Drain the log before returning
+    return agent, curve                                                                    # Trained agent + curve
 
-                obs_next, reward, terminated, truncated, info_next = env.step(action)      # Apply opponent action
-                episode_over = terminated or truncated                                     # Update termination
 
-                if terminated and info_next["winner"] == current_turn:
-                    # Opponent won — punish agent's last action (FIX H)
-                    losses += 1
-                    if last_obs is not None and last_action is not None:
-                        s_last      = agent._state_key(last_obs)                           # State before last agent move
-                        s_next_last = agent._state_key(obs_next)                           # Terminal next state
-                        agent.update(s_last, last_action, -5.0,
-                                     s_next_last, [], True)                                # Terminal loss update
-                elif terminated:
-                    if info_next["is_draw"]:
-                        draws += 1                                                         # Count draws explicitly
+def _train_worker(params: TrainParams, tag: str, init: Optional[dict] = None) -> dict:
+    """Process-pool entry point: train one agent and return its table as plain data."""
+    agent, curve = _run_training(params, tag, init)                                        # Independent training run
+    n = len(agent._id)                                                                     # Number of used rows
+    return {"keys": list(agent._id), "Q_table": agent.Q_table[:n].copy(),
+            "curve": curve, "epsilon": agent.epsilon}                                      # Picklable result
 
-                obs = obs_next                                                             # Advance observation
 
-        # Track moving win rate
-        recent.append(1 if info_next.get("winner", 0) in
-                      ([1] if ep % 2 != 0 else [2]) else 0)                                # Win indicator (agent side)
-        if len(recent) > window:
-            recent.pop(0)                                                                  # Maintain fixed window
-        curve.append(sum(recent) / len(recent))                                            # Append moving win-rate
+def _merge_tables(agent: PolicyQLearningV4, parts: List[dict]) -> int:
+    """
+    Load the mean of the workers' tables into agent and return the number of states.
+    States seen by several workers get the mean of their action values.
+    """
+    rows = [np.array([agent._ensure(k) for k in p["keys"]], dtype=np.intp) for p in parts]  # Worker rows → merged rows
+    n = len(agent._id)
+    totals = np.zeros((n, agent.n_actions), dtype=np.float64)                              # Summed action values
+    counts = np.zeros(n, dtype=np.int64)                                                   # Workers per state
+    for r, p in zip(rows, parts):
+        totals[r] += p["Q_table"]                                                          # Keys are unique per worker
+        counts[r] += 1
+    seen = counts > 0
+    agent.Q_table[:n][seen] = totals[seen] / counts[seen, None]                            # Mean over workers that saw it
+    return n
+
+
+def _train_parallel(params: TrainParams, workers: int,
+                    rounds: int = 1) -> Tuple[PolicyQLearningV4, np.ndarray]:
+    """
+    Train agents in worker processes and average their Q-tables.
+    The episodes are split into rounds; in each round every worker plays its
+    share of the episodes with its own seed, starting from the table merged
+    at the end of the previous round. Shares differ by at most one episode.
+    Workers start from the same snapshot, so averaging their tables averages
+    their updates. α and ε carry on across rounds as in a single run; each
+    worker decays ε by epsilon_decay ** workers per step, since it plays only
+    1/workers of the steps.
+    print_every is capped at a worker's share, so every worker logs at least
+    its final episode.
+    """
+    n_jobs = workers * rounds                                                              # Worker runs in total
+    if params.episodes < n_jobs:
+        raise ValueError(f"episodes={params.episodes} is less than workers * rounds = {n_jobs}")
+    base, extra = divmod(params.episodes, n_jobs)
+    shares = [base + (j < extra) for j in range(n_jobs)]                                   # Episodes per worker run, remainder first
+    done   = np.cumsum([0] + shares) / params.episodes                                     # Progress after each worker run
+
+    a0, a1  = params.alpha_start, params.alpha_end
+    epsilon = params.epsilon_start
+    snapshot, curves = None, []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rnd in range(rounds):
+            first, last = rnd * workers, (rnd + 1) * workers                               # Worker runs of this round
+            jobs = [replace(params, episodes=shares[j], seed=params.seed + j,
+                            print_every=min(params.print_every, shares[j]),
+                            alpha_start=a0 + (a1 - a0) * done[first],
+                            alpha_end=a0 + (a1 - a0) * done[last],
+                            epsilon_start=epsilon,
+                            epsilon_decay=params.epsilon_decay ** workers)
+                    for j in range(first, last)]                                           # One config per worker
+            tags = [f"[r{rnd} w{i}] " if rounds > 1 else f"[w{i}] " for i in range(workers)]
+            parts = list(pool.map(_train_worker, jobs, tags, [snapshot] * workers))        # Run workers in parallel
+
+            epsilon = float(np.mean([p["epsilon"] for p in parts]))                        # ε reached by the workers
+            agent = PolicyQLearningV4(EnvConnect4(), alpha=jobs[0].alpha_end, gamma=params.gamma,
+                                      epsilon=epsilon, seed=params.seed)                   # Agent holding the merged table
+            n = _merge_tables(agent, parts)
+            snapshot = {"keys": list(agent._id), "Q_table": agent.Q_table[:n]}             # Start point of the next round
+
+            # Average learning curve; a worker with one episode less drops out of the last point
+            padded = np.full((workers, shares[first]), np.nan)
+            for k, p in enumerate(parts):
+                padded[k, :len(p["curve"])] = p["curve"]
+            curves.append(np.nanmean(padded, axis=0))
+            print(f"Merged {workers} workers → states={n}")                                # Log merge summary
+
+    return agent, np.concatenate(curves)
 
-        if ep % print_every == 0:
-            cum_win = 100.0 * wins / ep                                                    # Cumulative win %
-            mov_win = 100.0 * curve[-1]                                                    # Moving win % (windowed)
-            print(
-                f"Ep {ep:>7}/{episodes} | "
-                f"CumWin%={cum_win:5.2f} | "
-                f"Win(last{window})={mov_win:5.2f}% | "
-                f"W/L/D {wins}/{losses}/{draws} | "
-                f"ε={agent.epsilon:.4f}  α={agent.alpha:.4f} | "
-                f"states={len(agent.Q)}"
-            )                                                                              # Log progress snapshot
+
+def train(
+    episodes:   int = 200_000,
+    seed:       int = 42,
+    print_every: int = 5_000,
+    q_file:     str = "q_table.pkl",
+    curve_file: str = "learning_curve.png",
+    workers:    int = 1,
+    rounds:     int = 1,
+) -> PolicyQLearningV4:
+    """
+    Train and return a PolicyQLearningV4 agent.
+    Importable by play.py:  agent = train(episodes=200000)
+    With workers > 1, the episodes are split across processes, whose tables
+    are merged after each of the given rounds (see _train_parallel).
+    """
+    params = TrainParams(
+        episodes=episodes, seed=seed,
+        print_every=print_every, q_file=q_file, curve_file=curve_file
+    )                                                        # Bundle training configuration
+
+    if workers > 1:
+        agent, curve = _train_parallel(params, workers, rounds)  # Parallel runs, merged every round
+    else:
+        agent, curve = _run_training(params)                 # Single-process training
 
     print("\nTraining complete.")                                                          # Training end marker
     agent.save(q_file)                                                                     # Save final Q-table
 
     # Learning curve plot
+    # A parallel curve has one point per worker episode, averaged over workers,
+    # so each point stands for `workers` episodes of the whole run
+    x = np.arange(len(curve)) * workers                                                    # Episodes played by all workers
     fig, ax = plt.subplots(figsize=(12, 5))                                                # Create plot figure/axes
-    ax.plot(curve, linewidth=0.6, alpha=0.4, color="steelblue", label="Win rate (raw)")    # Plot raw win-rate curve
-    if len(curve) > 5000:
-        n        = 5000
+    ax.plot(x, curve, linewidth=0.6, alpha=0.4, color="steelblue", label="Win rate (raw)")  # Plot raw win-rate curve
+    n = 5000 // workers                                                                    # Smoothing span of 5000 episodes
+    if len(curve) > n:
         smoothed = np.convolve(curve, np.ones(n) / n, mode="valid")                        # Compute moving smooth curve
-        ax.plot(range(n // 2, n // 2 + len(smoothed)), smoothed,
-                linewidth=2.5, color="coral", label=f"Smoothed (n={n})")                   # Plot smoothed curve
+        ax.plot((np.arange(len(smoothed)) + n // 2) * workers, smoothed,
+                linewidth=2.5, color="coral", label="Smoothed (n=5000)")                   # Plot smoothed curve
     ax.set_xlabel("Episode")                                                               # X label
-    ax.set_ylabel(f"Win Rate (moving avg, window={window})")                               # Y label
+    if workers > 1:
+        ax.set_ylabel(f"Win Rate (mean of {workers} workers, "
+                      f"window={WIN_WINDOW} per worker)")                                  # Y label (parallel run)
+    else:
+        ax.set_ylabel(f"Win Rate (moving avg, window={WIN_WINDOW})")                       # Y label
     ax.set_title("Training Learning Curve — Q-learning v4 (Feature-Based States)")         # Title
     ax.legend()                                                                            # Legend
     ax.set_ylim(0, 1)                                                                      # Clamp to [0,1]
@@ -439,6 +600,7 @@ def evaluate(
     out_plot: str = "evaluation.png",
 ):
     env = EnvConnect4()
+    env.reset(seed=seed)  # Seed once, so the random opponent is reproducible
     agent = PolicyQLearningV4(env, seed=seed)
     agent.load(q_file)
     agent.epsilon = 0.0
@@ -519,6 +681,8 @@ def main():
     parser.add_argument("--print_every", type=int, default=5_000)                           # Logging frequency
     parser.add_argument("--qfile",       type=str, default="q_table.pkl")                   # Q-table filename
     parser.add_argument("--curve",       type=str, default="learning_curve.png")           # Learning curve filename
+    parser.add_argument("--workers",     type=int, default=1)                               # Parallel training processes
+    parser.add_argument("--rounds",      type=int, default=1)                               # Table merges across workers
     args = parser.parse_args()                                                              # Parse CLI args
 
     if not (args.train or args.eval):
@@ -530,6 +694,7 @@ def main():
             episodes=args.episodes, seed=args.seed,
             print_every=args.print_every,
             q_file=args.qfile, curve_file=args.curve,
+            workers=args.workers, rounds=args.rounds,
         )                                                                                   # Run training pipeline
     if args.eval:
         evaluate(q_file=args.qfile, games=args.games, seed=args.seed)                       # Run evaluation pipeline
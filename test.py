@@ -131,6 +131,9 @@ def evaluate_vs_training_mix(agent, env, games=500, heuristic_prob=0.80, seed=42
     heuristic = PolicyHeuristic(seed=seed)
     rand_pol = PolicyRandom()
 
+    # Seed the environment generator once, the random opponent draws from it
+    env.reset(seed=seed)
+
     W = L = D = 0
 
     for i in range(games):